@@ -1,14 +1,22 @@
 import sys
 import os
-import cv2
+import math
+import functools
+import threading
+import tempfile
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageChops
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QLabel, QPushButton,
                              QVBoxLayout, QHBoxLayout, QWidget, QLineEdit, QComboBox,
                              QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QDialog,
                              QDialogButtonBox, QSpinBox, QCheckBox, QListWidget, QListWidgetItem)
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QIntValidator, QFont, QFontDatabase
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QFont, QFontDatabase
+from PyQt5.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+
+# 预览图长边的最大像素数，超过时在缩小后的图像上实时预览，导出时仍使用原图
+PREVIEW_MAX_SIDE = 1600
+# 混合区域超过该像素数且 cupy 可用时使用 GPU
+GPU_BLEND_MIN_PIXELS = 4000000
 
 class BatchExportDialog(QDialog):
     """
@@ -79,6 +87,24 @@ class BatchExportDialog(QDialog):
             "quality": self.quality_spin.value()
         }
     
+@functools.lru_cache(maxsize=1)
+def scan_system_fonts():
+    """
+    扫描 C:/Windows/Fonts 文件夹中的 .ttf、.ttc、.otf 文件，返回 (文件名, 完整路径, 字体族名称) 列表，
+    无法加载的字体族名称为 None。结果在进程内缓存，再次打开字体对话框时不会重复加载上百个字体文件。
+    """
+    font_dir = r"C:\Windows\Fonts"
+    exts = (".ttf", ".ttc", ".otf")
+    fonts = []
+    if os.path.exists(font_dir):
+        for entry in os.scandir(font_dir):
+            if entry.name.lower().endswith(exts):
+                # 加载字体文件
+                font_id = QFontDatabase.addApplicationFont(entry.path)
+                families = QFontDatabase.applicationFontFamilies(font_id)
+                fonts.append((entry.name, entry.path, families[0] if families else None))
+    return fonts
+
 class FontListDialog(QDialog):
     """
     扫描 C:/Windows/Fonts 下的常见字体文件，并以列表形式显示。
@@ -107,33 +133,22 @@ class FontListDialog(QDialog):
 
     def load_fonts(self):
         """
-        扫描 C:/Windows/Fonts 文件夹中的 .ttf、.ttc、.otf 文件，
-        使用 QFontDatabase 获取字体族名称，并将带有字体预览的项加入列表。
+        获取系统字体列表（见 scan_system_fonts），并将带有字体预览的项加入列表。
         """
-        font_dir = r"C:\Windows\Fonts"
-        exts = [".ttf", ".ttc", ".otf"]
-        if os.path.exists(font_dir):
-            for file in os.listdir(font_dir):
-                lower_file = file.lower()
-                if any(lower_file.endswith(ext) for ext in exts):
-                    full_path = os.path.join(font_dir, file)
-                    # 加载字体文件
-                    font_id = QFontDatabase.addApplicationFont(full_path)
-                    families = QFontDatabase.applicationFontFamilies(font_id)
-                    if families:
-                        family = families[0]
-                        # 使用字体族名称作为示例文字，同时展示预览效果
-                        sample_text = f"{family} - 示例文字"
-                        item_font = QFont(family, 14)
-                    else:
-                        # 若无法加载字体，则退化为显示文件名
-                        sample_text = file
-                        item_font = QFont()
-                    item = QListWidgetItem(sample_text)
-                    item.setFont(item_font)
-                    # 将完整路径存储在 Item 的 UserRole 数据中
-                    item.setData(Qt.UserRole, full_path)
-                    self.list_widget.addItem(item)
+        for file, full_path, family in scan_system_fonts():
+            if family:
+                # 使用字体族名称作为示例文字，同时展示预览效果
+                sample_text = f"{family} - 示例文字"
+                item_font = QFont(family, 14)
+            else:
+                # 若无法加载字体，则退化为显示文件名
+                sample_text = file
+                item_font = QFont()
+            item = QListWidgetItem(sample_text)
+            item.setFont(item_font)
+            # 将完整路径存储在 Item 的 UserRole 数据中
+            item.setData(Qt.UserRole, full_path)
+            self.list_widget.addItem(item)
 
     def get_selected_font_path(self):
         """
@@ -144,61 +159,244 @@ class FontListDialog(QDialog):
             return item.data(Qt.UserRole)
         return None
     
+@functools.lru_cache(maxsize=32)
+def _get_font(path, size):
+    """
+    按 (字体路径, 字号) 缓存 ImageFont 对象，避免每次刷新预览都重新解析字体文件。
+    """
+    return ImageFont.truetype(path, size)
+
+@functools.lru_cache(maxsize=8)
+def _get_text_mask(path, size, text):
+    """
+    返回文字的灰度 mask（L 模式，大小紧贴文字外框）及文字外框 bbox。
+    按 (字体路径, 字号, 文本) 缓存，预览和批量输出中短边相同的图片都可以直接复用。
+    """
+    font = _get_font(path, size)
+    bbox = font.getbbox(text)
+    mask = Image.new("L", (bbox[2] - bbox[0], bbox[3] - bbox[1]), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), text, font=font, fill=255)
+    return mask, bbox
+
+# 并行内核每次调用都会使用整个 numba 线程池：多个线程同时调用时，workqueue 线程层会直接终止进程，
+# omp/tbb 线程层则会让每个调用者各开一组线程、线程数成倍增加。因此同一时间只允许一个线程调用内核
+# （也用于保证内核只编译一次）
+_blend_kernel_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def _load_blend_kernel():
+    """
+    导入 numba 并编译混合内核，返回内核函数；numba 未安装时返回 None，由调用方退回 NumPy。
+    numba 为可选依赖，导入和编译都较慢，因此推迟到第一次使用时（启动后由后台线程预热）。
+    需在持有 _blend_kernel_lock 时调用。
+    """
+    try:
+        from numba import config, njit, prange, types
+    except ImportError:
+        return None
+    # 线程池由后台线程启动：tbb 线程层在非主线程启动后进程无法正常退出，因此固定使用 numba 自带的 workqueue。
+    # workqueue 不支持并发调用，这里已由 _blend_kernel_lock 串行化
+    config.THREADING_LAYER = "workqueue"
+
+    def blend(roi, src):
+        """
+        src（RGBA）按 alpha 逐像素叠加到 roi（RGB）上，一次遍历完成，不产生中间数组。
+        """
+        h, w = roi.shape[0], roi.shape[1]
+        for j in prange(h):
+            for i in range(w):
+                a = int(src[j, i, 3])
+                # 全透明像素保持不变，完全不透明像素直接拷贝，结果与下面的公式一致
+                if a == 0:
+                    continue
+                if a == 255:
+                    for c in range(3):
+                        roi[j, i, c] = src[j, i, c]
+                    continue
+                inv = 255 - a
+                for c in range(3):
+                    roi[j, i, c] = (int(src[j, i, c]) * a + int(roi[j, i, c]) * inv + 127) // 255
+
+    # 显式声明参数类型：roi 为画布上裁出的可写切片（任意内存布局），src 为只读的水印图块（np.asarray(PIL 图像)），
+    # 连续与不连续、可写与只读的数组都匹配这一个签名，在这里一次编译完成，之后的调用不会再触发编译
+    signature = types.void(types.Array(types.uint8, 3, "A"), types.Array(types.uint8, 3, "A", readonly=True))
+    # nogil=True 让内核运行时其他线程可以继续解码、编码
+    try:
+        # cache=True 把编译结果缓存到磁盘；源码目录不可写时 numba 会改用用户目录下的缓存，
+        # 打包成 exe 后若找不到源文件则无法缓存并抛出 RuntimeError，此时退回不缓存、每次启动编译
+        return njit(signature, parallel=True, nogil=True, cache=True)(blend)
+    except RuntimeError:
+        return njit(signature, parallel=True, nogil=True)(blend)
+
+def warm_up_blend():
+    """
+    提前导入 numba 并编译混合内核，避免第一次预览时卡顿。应在后台线程中调用。
+    """
+    with _blend_kernel_lock:
+        _load_blend_kernel()
+
+@functools.lru_cache(maxsize=1)
+def _load_cupy():
+    """
+    导入 cupy 并检查是否有可用的 CUDA 设备，返回 cupy 模块；不可用时返回 None。
+    cupy 为可选依赖，导入和探测设备都较慢，只在第一次遇到超大混合区域时进行。
+    """
+    try:
+        import cupy as cp
+        if cp.cuda.runtime.getDeviceCount() == 0:
+            return None
+    except Exception:
+        return None
+    return cp
+
+def _src_over(xp, roi, src):
+    """
+    src（RGBA）按 alpha 叠加到 roi（RGB）上并返回结果，xp 为 numpy 或 cupy 模块。
+    """
+    alpha = src[..., 3:4].astype(xp.uint16)
+    fg = src[..., :3].astype(xp.uint16)
+    return ((fg * alpha + roi * (255 - alpha) + 127) // 255).astype(xp.uint8)
+
+def _blend_tile(dst, tile, pos):
+    """
+    将 RGBA 小图块按 alpha 叠加到 dst（RGB ndarray）上 pos 处，原地修改。
+    只读写图块覆盖到的区域（超出画布的部分会被裁掉），不触碰整张图。
+    """
+    x, y = pos
+    tile = np.asarray(tile)
+    h, w = tile.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, dst.shape[1]), min(y + h, dst.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    src = tile[y0 - y:y1 - y, x0 - x:x1 - x]
+    roi = dst[y0:y1, x0:x1]
+    cp = _load_cupy() if roi.shape[0] * roi.shape[1] >= GPU_BLEND_MIN_PIXELS else None
+    if cp is not None:
+        # 只把水印覆盖的区域上传到 GPU，算完再拷回
+        roi[:] = cp.asnumpy(_src_over(cp, cp.asarray(roi), cp.asarray(src)))
+    else:
+        with _blend_kernel_lock:
+            kernel = _load_blend_kernel()
+            if kernel is not None:
+                kernel(roi, src)
+        if kernel is None:
+            roi[:] = _src_over(np, roi, src)
+
 class WatermarkProcessor:
     """
     负责图像水印处理，将文本和图片水印应用到原图上。
     """
-    def __init__(self, original_image, font_path):
-        # original_image 为 cv2 格式（BGR），font_path 为字体路径
+    # 缩放并调整过透明度的图片水印，所有处理器共享（批量输出时尺寸相同的图片只需缩放一次）。
+    # 键为 (水印 id, 宽, 高, 透明度, 是否预览)，值为 (原水印, 结果)；保存原水印的引用，保证 id 在缓存期内不会被复用
+    _wm_cache = {}
+    _wm_cache_lock = threading.Lock()
+    WM_CACHE_SIZE = 4
+
+    def __init__(self, original_image, font_path, pixel_scale=1.0):
+        # original_image 为 RGB 格式的 ndarray（只读，不会被修改），font_path 为字体路径
+        # original_image 若是缩小后的预览图，pixel_scale 为它相对原图的比例，
+        # 像素单位的参数（偏移、阴影宽度、间隔）会按该比例换算
         self.original_image = original_image
         self.font_path = font_path
+        self.pixel_scale = pixel_scale
+        # 上一次生成的完整（未被画布裁剪的）文本水印图块，键为 (字体路径, 字号, 文本, 透明度, 阴影参数)
+        self._text_tile_key = None
+        self._text_tile = None
+        # 预览时复用的输出缓冲区，以及上一次混合过水印的区域 (left, top, right, bottom)
+        self._preview_result = None
+        self._dirty_rect = None
+
+    def get_text_mask(self, font_path, text, font_size):
+        """
+        返回文字的灰度 mask（L 模式，大小紧贴文字外框）及文字外框 bbox。
+        只有文本、字号或字体变化时才重新光栅化，调整透明度、位置等参数时直接复用。
+        """
+        return _get_text_mask(font_path, font_size, text)
 
-    def apply_text_watermark(self, image, text, font_size, position, opacity, offset_x, offset_y, 
+    def apply_text_watermark(self, image_size, text, font_size, position, opacity, offset_x, offset_y,
                              shadow=False, shadow_width=0, shadow_intensity=50):
         """
-        在传入的 PIL 图像上添加文本水印，返回叠加图层、文本位置及文本尺寸。
+        根据背景图尺寸 image_size 生成文本水印图块，返回 (图块, 图块位置, 文本位置, 文本尺寸)。
+        图块只覆盖文字（及阴影）所在的区域，没有可绘制内容时图块为 None。
         如果 shadow 为 True，则在文字四周添加渐变阴影（只出现在文字外部），
         阴影模糊半径由 shadow_width 指定，阴影浓淡由 shadow_intensity 决定（百分比），
         阴影不会覆盖文字本身。
         """
-        overlay = Image.new('RGBA', image.size, (255, 255, 255, 0))
-        font = ImageFont.truetype(self.font_path, font_size)
-        draw = ImageDraw.Draw(overlay)
-        bbox = draw.textbbox((0, 0), text, font=font)
+        image_width, image_height = image_size
+        # 字体路径只读取一次，保证 mask 与缓存键使用同一个字体
+        font_path = self.font_path
+        text_mask, bbox = self.get_text_mask(font_path, text, font_size)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
-        positions = {
-            "右下角": (image.width - text_width - offset_x, image.height - text_height - offset_y),
-            "左下角": (offset_x, image.height - text_height - offset_y),
-            "左上角": (offset_x, offset_y),
-            "右上角": (image.width - text_width - offset_x, offset_y)
-        }
-        text_pos = positions.get(position, (image.width - text_width - offset_x, image.height - text_height - offset_y))
-        
-        if shadow and shadow_width > 0:
+        # 只计算所选位置的坐标，未知位置按右下角处理
+        if position == "左下角":
+            text_pos = (offset_x, image_height - text_height - offset_y)
+        elif position == "左上角":
+            text_pos = (offset_x, offset_y)
+        elif position == "右上角":
+            text_pos = (image_width - text_width - offset_x, offset_y)
+        else:
+            text_pos = (image_width - text_width - offset_x, image_height - text_height - offset_y)
+
+        # 阴影浓淡或文字透明度为 0 时阴影完全透明，直接跳过模糊等计算
+        desired_shadow_alpha = int(opacity * shadow_intensity / 100)
+        draw_shadow = shadow and shadow_width > 0 and desired_shadow_alpha > 0
+
+        # 文字透明度为 0 时（此时也没有阴影）图块完全透明，不必生成
+        if opacity <= 0:
+            return None, (0, 0), text_pos, (text_width, text_height)
+
+        # 图块范围：文字实际占用的区域，加上阴影模糊需要的外扩，并裁剪到背景图内
+        pad = math.ceil(shadow_width * 3) if draw_shadow else 0
+        left = max(text_pos[0] + bbox[0] - pad, 0)
+        top = max(text_pos[1] + bbox[1] - pad, 0)
+        right = min(text_pos[0] + bbox[2] + pad, image_width)
+        bottom = min(text_pos[1] + bbox[3] + pad, image_height)
+        if right <= left or bottom <= top:
+            return None, (0, 0), text_pos, (text_width, text_height)
+        tile_size = (right - left, bottom - top)
+        # 文字 mask 在图块内的左上角坐标
+        glyph_pos = (text_pos[0] + bbox[0] - left, text_pos[1] + bbox[1] - top)
+
+        # 图块完整位于画布内时，其内容与位置无关：只改偏移或角落时直接复用上次的图块，不必重新模糊
+        unclipped = tile_size == (text_width + 2 * pad, text_height + 2 * pad)
+        key = (font_path, font_size, text, opacity, draw_shadow, shadow_width, shadow_intensity)
+        if unclipped and self._text_tile_key == key:
+            return self._text_tile, (left, top), text_pos, (text_width, text_height)
+
+        overlay = Image.new('RGBA', tile_size, (255, 255, 255, 0))
+        if draw_shadow:
             # 创建文字mask（灰度图，白色区域为文字区域）
-            mask = Image.new("L", image.size, 0)
-            mask_draw = ImageDraw.Draw(mask)
-            mask_draw.text(text_pos, text, font=font, fill=255)
+            mask = Image.new("L", tile_size, 0)
+            mask.paste(text_mask, glyph_pos)
             # 对mask进行高斯模糊
-            blurred = mask.filter(ImageFilter.GaussianBlur(radius=shadow_width))
-            # 得到仅在文字外部的阴影区域（将原始文字mask减去）
-            shadow_mask = ImageChops.subtract(blurred, mask)
-            # 使用用户设置的阴影浓淡（shadow_intensity 0~100）
-            desired_shadow_alpha = int(opacity * shadow_intensity / 100)
-            shadow_mask = shadow_mask.point(lambda p: p * (desired_shadow_alpha / 255.0))
+            blurred = np.asarray(mask.filter(ImageFilter.GaussianBlur(radius=shadow_width)))
+            mask_array = np.asarray(mask)
+            # 使用用户设置的阴影浓淡（shadow_intensity 0~100），按比例缩放的查找表
+            lut = np.round(np.arange(256) * (desired_shadow_alpha / 255.0)).astype(np.uint8)
+            # 得到仅在文字外部的阴影区域（将原始文字mask减去），并一次完成浓淡缩放
+            shadow_mask = lut[np.where(blurred > mask_array, blurred - mask_array, 0)]
             # 生成阴影层（填充黑色）
-            shadow_layer = Image.new("RGBA", image.size, (0, 0, 0, 0))
-            shadow_layer.putalpha(shadow_mask)
+            shadow_layer = Image.new("RGBA", tile_size, (0, 0, 0, 0))
+            shadow_layer.putalpha(Image.fromarray(shadow_mask))
             # 将阴影层合成到底部
             overlay = Image.alpha_composite(overlay, shadow_layer)
-        
+
         # 绘制正常文字（确保文字区域不被阴影覆盖）
         draw = ImageDraw.Draw(overlay)
-        draw.text(text_pos, text, font=font, fill=(255, 255, 255, opacity))
-        return overlay, text_pos, (text_width, text_height)
-
-    def apply_image_watermark(self, overlay, watermark_image, text_position, text_size, image_params):
+        draw.bitmap(glyph_pos, text_mask, fill=(255, 255, 255, opacity))
+        if unclipped:
+            self._text_tile_key = key
+            self._text_tile = overlay
+        return overlay, (left, top), text_pos, (text_width, text_height)
+
+    def apply_image_watermark(self, image_size, watermark_image, text_position, text_size, image_params,
+                              preview=False):
+        """
+        按参数缩放图片水印并调整透明度，返回 (缩放后的水印, 粘贴位置)。
+        preview 为 True 时使用较快的 cv2.resize，导出时使用 LANCZOS 保证画质。
+        """
         # 1. 解析用户输入
         size_percent = image_params.get("size", 10)  # 1~100
         wm_opacity = int(image_params.get("opacity", 80)) * 255 // 100
@@ -206,7 +404,7 @@ class WatermarkProcessor:
         watermark_pos = image_params.get("position", "上")
 
         # 2. 计算目标尺寸
-        bg_width, bg_height = overlay.size
+        bg_width, bg_height = image_size
         short_side = min(bg_width, bg_height)
 
         # 让“水印的短边 = 背景图短边 * size_percent%”
@@ -224,36 +422,67 @@ class WatermarkProcessor:
         new_w = int(wm_original_w * scale)
         new_h = int(wm_original_h * scale)
 
-        # 3. 进行缩放
-        wm_resized = watermark_image.resize((new_w, new_h), Image.Resampling.LANCZOS).convert('RGBA')
-
-        # 4. 调整水印透明度
-        alpha = wm_resized.split()[3]
-        alpha = Image.eval(alpha, lambda a: wm_opacity * a // 255)
-        wm_resized.putalpha(alpha)
+        # 3. 进行缩放、4. 调整水印透明度
+        # 结果按尺寸和透明度缓存，只改文字或位置时不必重新缩放
+        key = (id(watermark_image), new_w, new_h, wm_opacity, preview)
+        with self._wm_cache_lock:
+            cached = self._wm_cache.get(key)
+        if cached is not None:
+            wm_resized = cached[1]
+        else:
+            if preview:
+                import cv2
+                # 预览时直接用 cv2.resize 处理 ndarray，缩小用 INTER_AREA，放大用双线性
+                interpolation = cv2.INTER_AREA if new_w < wm_original_w else cv2.INTER_LINEAR
+                wm_array = cv2.resize(np.asarray(watermark_image.convert('RGBA')), (new_w, new_h),
+                                      interpolation=interpolation)
+            else:
+                wm_array = np.array(watermark_image.resize((new_w, new_h), Image.Resampling.LANCZOS).convert('RGBA'))
+            alpha = wm_array[..., 3]
+            wm_array[..., 3] = (alpha.astype(np.uint16) * wm_opacity // 255).astype(np.uint8)
+            wm_resized = Image.fromarray(wm_array)
+            with self._wm_cache_lock:
+                self._wm_cache[key] = (watermark_image, wm_resized)
+                if len(self._wm_cache) > self.WM_CACHE_SIZE:
+                    # 淘汰最早加入的一项
+                    del self._wm_cache[next(iter(self._wm_cache))]
         wm_w, wm_h = wm_resized.size
 
         # 5. 计算粘贴位置(保持你原先的逻辑不变)
         text_x, text_y = text_position
         text_width, text_height = text_size
 
-        wm_positions = {
-            "下": (text_x + (text_width - wm_w) // 2, text_y + text_height + spacing),
-            "上": (text_x + (text_width - wm_w) // 2, text_y - wm_h - spacing),
-            "左": (text_x - wm_w - spacing, text_y + (text_height - wm_h) // 2),
-            "右": (text_x + text_width + spacing, text_y + (text_height - wm_h) // 2)
-        }
-        wm_pos = wm_positions.get(watermark_pos, (text_x + (text_width - wm_w) // 2, text_y - wm_h - spacing))
-        overlay.paste(wm_resized, wm_pos, wm_resized)
-        return overlay
-
+        # 只计算所选位置的坐标，未知位置按“上”处理
+        if watermark_pos == "下":
+            wm_pos = (text_x + (text_width - wm_w) // 2, text_y + text_height + spacing)
+        elif watermark_pos == "左":
+            wm_pos = (text_x - wm_w - spacing, text_y + (text_height - wm_h) // 2)
+        elif watermark_pos == "右":
+            wm_pos = (text_x + text_width + spacing, text_y + (text_height - wm_h) // 2)
+        else:
+            wm_pos = (text_x + (text_width - wm_w) // 2, text_y - wm_h - spacing)
+        return wm_resized, wm_pos
 
-    def process(self, text, text_params, image_watermark=None, image_params=None):
-        base_image = Image.fromarray(cv2.cvtColor(self.original_image, cv2.COLOR_BGR2RGB)).convert('RGBA')
-        overlay = Image.new('RGBA', base_image.size, (255, 255, 255, 0))
+    def process(self, text, text_params, image_watermark=None, image_params=None, preview=False):
+        """
+        返回叠加水印后的图像（RGB ndarray）。只在水印覆盖的区域内做混合，原图保持不变。
+        preview 为 True 时用于界面预览，图片水印使用较快的插值方式；
+        此时返回的数组会在下一次预览时被复用（调用方需在下一次预览前用完）。
+        """
+        if preview:
+            # 复用上次的输出缓冲区，只把上次画过水印的区域恢复成原图，避免每次复制整张图
+            if self._preview_result is None:
+                self._preview_result = self.original_image.copy()
+            elif self._dirty_rect is not None:
+                left, top, right, bottom = self._dirty_rect
+                self._preview_result[top:bottom, left:right] = self.original_image[top:bottom, left:right]
+            self._dirty_rect = None
+            result = self._preview_result
+        else:
+            result = self.original_image.copy()
 
         # 获取背景图大小
-        bg_width, bg_height = base_image.size
+        bg_height, bg_width = result.shape[:2]
         short_side = min(bg_width, bg_height)
 
         # --- 将字体大小从“百分比”转成“像素” ---
@@ -266,9 +495,18 @@ class WatermarkProcessor:
         text_params_px = text_params.copy()
         text_params_px["font_size"] = font_size_px
 
+        # 在缩小的预览图上处理时，偏移、阴影宽度和间隔也按同样比例缩小
+        if self.pixel_scale != 1.0:
+            for key in ("offset_x", "offset_y"):
+                text_params_px[key] = int(round(text_params_px.get(key, 120) * self.pixel_scale))
+            text_params_px["shadow_width"] = text_params_px.get("shadow_width", 0) * self.pixel_scale
+            if image_params:
+                image_params = dict(image_params)
+                image_params["spacing"] = int(round(image_params.get("spacing", 5) * self.pixel_scale))
+
         # 调用 apply_text_watermark
-        text_overlay, text_pos, text_size = self.apply_text_watermark(
-            base_image,
+        text_tile, tile_pos, text_pos, text_size = self.apply_text_watermark(
+            (bg_width, bg_height),
             text,
             text_params_px["font_size"],
             text_params_px.get("position", "右下角"),
@@ -279,19 +517,42 @@ class WatermarkProcessor:
             shadow_width=text_params_px.get("shadow_width", 0),
             shadow_intensity=text_params_px.get("shadow_intensity", 50)
         )
-        overlay = Image.alpha_composite(overlay, text_overlay)
+        boxes = []
+        if text_tile is not None:
+            boxes.append((tile_pos, text_tile.size))
 
         # 如果有图片水印，则添加
-        if image_watermark and image_params:
-            overlay = self.apply_image_watermark(overlay, image_watermark, text_pos, text_size, image_params)
-
-        final_image = Image.alpha_composite(base_image, overlay)
-        return final_image
-
-
+        wm_resized = None
+        # 图片水印透明度为 0 时不会改变任何像素，直接跳过缩放和粘贴
+        if image_watermark and image_params and int(image_params.get("opacity", 80)) > 0:
+            wm_resized, wm_pos = self.apply_image_watermark((bg_width, bg_height), image_watermark,
+                                                            text_pos, text_size, image_params, preview)
+            boxes.append((wm_pos, wm_resized.size))
+        if not boxes:
+            return result
+
+        # 文字和图片水印合并到同一个图块里（裁剪到背景图范围内），最后只对这块区域混合一次
+        left = max(min(x for (x, _), _ in boxes), 0)
+        top = max(min(y for (_, y), _ in boxes), 0)
+        right = min(max(x + w for (x, _), (w, _) in boxes), bg_width)
+        bottom = min(max(y + h for (_, y), (_, h) in boxes), bg_height)
+        if right <= left or bottom <= top:
+            return result
+        if preview:
+            self._dirty_rect = (left, top, right, bottom)
+        overlay = Image.new('RGBA', (right - left, bottom - top), (255, 255, 255, 0))
+        if text_tile is not None:
+            overlay.paste(text_tile, (tile_pos[0] - left, tile_pos[1] - top))
+        if wm_resized is not None:
+            overlay.paste(wm_resized, (wm_pos[0] - left, wm_pos[1] - top), wm_resized)
+        _blend_tile(result, overlay, (left, top))
+        return result
+
+
+@functools.lru_cache(maxsize=1)
 def get_chinese_font():
     """
-    依次检查常见字体路径，返回存在的字体路径。
+    依次检查常见字体路径，返回存在的字体路径。结果在进程内不变，只查找一次。
     """
     font_paths = [
         "C:/Windows/Fonts/simhei.ttf",
@@ -303,6 +564,118 @@ def get_chinese_font():
             return path
     return None
 
+def read_image(path):
+    """
+    读取图片文件并返回 RGB 格式的 ndarray，读取失败时返回 None。
+    使用 np.fromfile + cv2.imdecode 一次完成解码，兼容包含中文的路径。
+    """
+    # cv2 导入较慢，推迟到第一次读取图片时再导入，让主窗口尽快显示
+    import cv2
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError:
+        return None
+    # 与之前使用 PIL 读取时一致，不根据 EXIF 信息旋转图片
+    if hasattr(cv2, "IMREAD_COLOR_RGB"):
+        # OpenCV 4.10 起解码器可以直接输出 RGB，省去一次颜色通道转换
+        return cv2.imdecode(data, cv2.IMREAD_COLOR_RGB | cv2.IMREAD_IGNORE_ORIENTATION)
+    image = cv2.imdecode(data, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        return None
+    # cv2 解码结果为 BGR，原地转换为 RGB，不再额外分配整图内存
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image
+
+# 进程的 umask，用于给临时文件设置与普通新建文件相同的权限（mkstemp 创建的文件只有所有者可读写）。
+# os.umask 只能通过设置来读取，因此在导入时（尚未启动其他线程）读取一次
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def save_image(image, path, fmt, quality=95):
+    """
+    将 RGB ndarray 按 fmt（"JPEG" 或 "PNG"）保存到 path，JPEG 使用 quality 指定的压缩质量。
+    先用 1MB 缓冲写入同目录下唯一命名的临时文件，完成后再替换为目标文件，
+    中途失败不会留下不完整的图片，并行保存的多个任务也不会共用同一个临时文件。
+    """
+    pil_image = Image.fromarray(image)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+            if fmt == "JPEG":
+                pil_image.save(f, "JPEG", quality=quality)
+            else:
+                pil_image.save(f, "PNG")
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def export_watermarked(img_path, out_path, fmt, quality, font_path, text, text_params,
+                       image_watermark=None, image_params=None):
+    """
+    读取 img_path，按参数添加水印后保存到 out_path；读取或保存失败时抛出异常。
+    """
+    original_image = read_image(img_path)
+    if original_image is None:
+        raise ValueError(f"无法读取图片: {img_path}")
+    processor = WatermarkProcessor(original_image, font_path)
+    final_image = processor.process(text, text_params, image_watermark=image_watermark, image_params=image_params)
+    save_image(final_image, out_path, fmt, quality)
+
+class ExportTaskSignals(QObject):
+    # 参数为 (输入图片路径, 异常对象；成功时为 None)
+    finished = pyqtSignal(str, object)
+
+class ExportTask(QRunnable):
+    """
+    在 QThreadPool 中处理并保存单张图片，完成后通过 signals.finished 通知界面线程。
+    """
+    def __init__(self, img_path, out_path, *args):
+        super().__init__()
+        self.img_path = img_path
+        self.out_path = out_path
+        self.args = args  # 传给 export_watermarked 的其余参数
+        self.signals = ExportTaskSignals()
+
+    def run(self):
+        error = None
+        try:
+            export_watermarked(self.img_path, self.out_path, *self.args)
+        except Exception as e:
+            error = e
+        self.signals.finished.emit(self.img_path, error)
+
+class RenderTaskSignals(QObject):
+    # 参数为预览结果（RGB ndarray；处理失败时为 None）
+    finished = pyqtSignal(object)
+
+class RenderTask(QRunnable):
+    """
+    在 QThreadPool 中生成一次预览，完成后通过 signals.finished 把结果交回界面线程。
+    """
+    def __init__(self, processor, font_path, text, text_params, image_watermark, image_params):
+        super().__init__()
+        self.processor = processor
+        self.font_path = font_path
+        self.text = text
+        self.text_params = text_params
+        self.image_watermark = image_watermark
+        self.image_params = image_params
+        self.signals = RenderTaskSignals()
+
+    def run(self):
+        result = None
+        try:
+            # 字体在任务中设置：同一处理器同一时间只有一个预览任务，界面线程不直接修改处理器
+            self.processor.font_path = self.font_path
+            result = self.processor.process(self.text, self.text_params, image_watermark=self.image_watermark,
+                                            image_params=self.image_params, preview=True)
+        except Exception as e:
+            print("预览生成失败:", e)
+        self.signals.finished.emit(result)
+
 class ExportDialog(QDialog):
     """
     自定义对话框，允许用户选择输出格式、输出路径和（针对 JPEG）压缩质量。
@@ -391,11 +764,31 @@ class WatermarkApp(QMainWindow):
         self.setWindowTitle('批量水印工具')
         self.setGeometry(100, 100, 1200, 800)
         self.image_paths = []
-        self.original_image = None  # 存储 cv2 格式图像（BGR）
+        self.current_index = 0  # 当前预览的图片在 image_paths 中的序号
+        self.original_image = None  # 存储 RGB 格式的 ndarray
+        self.preview_image = None  # 用于实时预览的（可能缩小的）RGB ndarray
         self.watermark_image = None  # 存储 PIL 格式的水印图片（RGBA）
         self.font_path = get_chinese_font()
         self.processor = None  # 图片加载后初始化
+        self._display_buf = None  # 当前预览 QImage 引用的像素缓冲区
+        self._last_state = None  # 上一次预览使用的全部参数，未变化时跳过重绘
+        # 预览在后台线程生成，同一时间只运行一个任务；运行期间的修改在任务结束后再合并渲染一次
+        self._render_task = None
+        self._render_pending = False
+        self._fit_pending = False  # 新图片的第一帧预览显示后再适配视图
+        self._batch_tasks = []  # 正在执行的批量输出任务
+        # 批量输出使用独立的线程池并空出一个核心，预览任务（全局线程池）不会排在批量任务后面
+        self._export_pool = QThreadPool(self)
+        self._export_pool.setMaxThreadCount(max(1, QThreadPool.globalInstance().maxThreadCount() - 1))
+        self._batch_done = 0
+        self._batch_out_folder = ""
+        # 输入变化时不立即重绘，而是合并一小段时间内的连续修改，只渲染最后一次
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.update_watermark)
         self.initUI()
+        # 在后台线程中预编译混合内核，界面线程不等待编译
+        threading.Thread(target=warm_up_blend, daemon=True).start()
     def batch_export_images(self):
         # 如果没有加载图片则直接返回
         if not self.image_paths:
@@ -416,46 +809,61 @@ class WatermarkApp(QMainWindow):
         # 从当前界面获取水印参数（以第一张图片的设置为准）
         text = self.text_input.text()
         text_params = {
-            "font_size": int(self.font_size_input.text() or "1"),
+            "font_size": self.font_size_input.value(),
             "position": self.position_combo.currentText(),
-            "opacity": int(self.opacity_input.text() or "0"),
-            "offset_x": int(self.offset_x_input.text() or "0"),#这里
-            "offset_y": int(self.offset_y_input.text() or "0"),#这里
+            "opacity": self.opacity_input.value(),
+            "offset_x": self.offset_x_input.value(),#这里
+            "offset_y": self.offset_y_input.value(),#这里
             "shadow": self.shadow_checkbox.isChecked(),
-            "shadow_width": int(self.shadow_width_input.text() or "0"),
-            "shadow_intensity": int(self.shadow_intensity_input.text() or "50")
+            "shadow_width": self.shadow_width_input.value(),
+            "shadow_intensity": self.shadow_intensity_input.value()
         }
         image_params = {
             "position": self.watermark_position_combo.currentText(),
-            "size": int(self.watermark_size_input.text() or "0"),
-            "opacity": int(self.watermark_opacity_input.text() or "0"),
-            "spacing": int(self.spacing_input.text() or "0")
+            "size": self.watermark_size_input.value(),
+            "opacity": self.watermark_opacity_input.value(),
+            "spacing": self.spacing_input.value()
         }
 
-        # 批量处理每张图片
+        # 批量处理每张图片：各图片互不依赖，放到 QThreadPool 中并行处理，界面线程不被阻塞
+        self._batch_tasks = []
+        self._batch_out_folder = out_folder
+        self.batch_export_btn.setEnabled(False)
+        used_names = set()
         for img_path in self.image_paths:
-            pil_img = Image.open(img_path)
-            original_image = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-            processor = WatermarkProcessor(original_image, self.font_path)
-            final_image = processor.process(
-                text,
-                text_params,
-                image_watermark=self.watermark_image,
-                image_params=image_params if self.watermark_image else None
-            )
-
             # 修改这里：根据选择的格式生成新的扩展名
             base_name, _ = os.path.splitext(os.path.basename(img_path))
             new_ext = ".jpg" if fmt == "JPEG" else ".png"
-            out_path = os.path.join(out_folder, base_name + new_ext)
-
-            # 保存图像
-            if fmt == "JPEG":
-                final_image.convert("RGB").save(out_path, "JPEG", quality=quality)
-            else:
-                final_image.save(out_path, "PNG")
-
-        print(f"批量输出完成，共处理 {len(self.image_paths)} 张图片，输出到：{out_folder}")
+            # 不同输入可能得到相同的输出文件名（如 a.png 与 a.jpg、不同文件夹下的同名图片），
+            # 后出现的依次加上 _2、_3 等后缀，避免并行任务互相覆盖
+            out_name = base_name + new_ext
+            n = 1
+            while os.path.normcase(out_name) in used_names:
+                n += 1
+                out_name = f"{base_name}_{n}{new_ext}"
+            used_names.add(os.path.normcase(out_name))
+            out_path = os.path.join(out_folder, out_name)
+
+            task = ExportTask(img_path, out_path, fmt, quality, self.font_path, text, text_params,
+                              self.watermark_image, image_params if self.watermark_image else None)
+            task.signals.finished.connect(self.on_batch_task_finished)
+            self._batch_tasks.append(task)
+        self.statusBar().showMessage(f"批量输出中：0/{len(self._batch_tasks)}")
+        for task in self._batch_tasks:
+            self._export_pool.start(task)
+
+    def on_batch_task_finished(self, img_path, error):
+        if error is not None:
+            print("处理失败:", img_path, error)
+        total = len(self._batch_tasks)
+        self._batch_done += 1
+        self.statusBar().showMessage(f"批量输出中：{self._batch_done}/{total}")
+        if self._batch_done == total:
+            self.statusBar().showMessage(f"批量输出完成，共处理 {total} 张图片", 5000)
+            print(f"批量输出完成，共处理 {total} 张图片，输出到：{self._batch_out_folder}")
+            self._batch_tasks = []
+            self._batch_done = 0
+            self.batch_export_btn.setEnabled(True)
         
     # 在 WatermarkApp 类的 initUI 方法中，添加“选择字体”按钮
     def initUI(self):
@@ -478,28 +886,38 @@ class WatermarkApp(QMainWindow):
         self.load_btn.clicked.connect(self.load_images)
         control_layout.addWidget(self.load_btn)
 
+        # 在已选择的图片之间切换预览，只在切换时读取对应的那一张
+        nav_layout = QHBoxLayout()
+        self.prev_btn = QPushButton('上一张')
+        self.prev_btn.clicked.connect(self.show_prev_image)
+        self.next_btn = QPushButton('下一张')
+        self.next_btn.clicked.connect(self.show_next_image)
+        nav_layout.addWidget(self.prev_btn)
+        nav_layout.addWidget(self.next_btn)
+        control_layout.addLayout(nav_layout)
+
         # 文本水印相关输入
         self.text_input = QLineEdit(self)
         self.text_input.setText("")
-        self.text_input.textChanged.connect(self.update_watermark)
+        self.text_input.textChanged.connect(self._schedule_update)
         add_labeled_input("水印文本", self.text_input)
 
         self.position_combo = QComboBox(self)
         self.position_combo.addItems(["右下角", "左下角", "左上角", "右上角"])
         self.position_combo.setCurrentText("右下角")
-        self.position_combo.currentIndexChanged.connect(self.update_watermark)
+        self.position_combo.currentIndexChanged.connect(self._schedule_update)
         add_labeled_input("位置", self.position_combo)
 
-        self.opacity_input = QLineEdit(self)
-        self.opacity_input.setValidator(QIntValidator(0, 100))
-        self.opacity_input.setText("50")
-        self.opacity_input.textChanged.connect(self.update_watermark)
+        self.opacity_input = QSpinBox(self)
+        self.opacity_input.setRange(0, 100)
+        self.opacity_input.setValue(50)
+        self.opacity_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("透明度 (%)", self.opacity_input)
 
         self.font_size_input = QSpinBox(self)
         self.font_size_input.setRange(1, 100)  # 范围 1~100
         self.font_size_input.setValue(10)      # 默认 10
-        self.font_size_input.valueChanged.connect(self.update_watermark)
+        self.font_size_input.valueChanged.connect(self._schedule_update)
 
         # 如果你想用同样的 add_labeled_input 函数，就把 input_widget 换成 self.font_size_input 即可。
         # 假设你不想改 add_labeled_input 逻辑，就简单改成如下：
@@ -516,41 +934,41 @@ class WatermarkApp(QMainWindow):
         self.font_select_btn.clicked.connect(self.select_font)
         control_layout.addWidget(self.font_select_btn)
 
-        self.offset_x_input = QLineEdit(self)
-        self.offset_x_input.setValidator(QIntValidator(0, 1000))
-        self.offset_x_input.setText("120")
-        self.offset_x_input.textChanged.connect(self.update_watermark)
+        self.offset_x_input = QSpinBox(self)
+        self.offset_x_input.setRange(0, 1000)
+        self.offset_x_input.setValue(120)
+        self.offset_x_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("水平偏移 (px)", self.offset_x_input)
 
-        self.offset_y_input = QLineEdit(self)
-        self.offset_y_input.setValidator(QIntValidator(0, 1000))
-        self.offset_y_input.setText("120")
-        self.offset_y_input.textChanged.connect(self.update_watermark)
+        self.offset_y_input = QSpinBox(self)
+        self.offset_y_input.setRange(0, 1000)
+        self.offset_y_input.setValue(120)
+        self.offset_y_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("垂直偏移 (px)", self.offset_y_input)
 
-        self.spacing_input = QLineEdit(self)
-        self.spacing_input.setValidator(QIntValidator(0, 100))
-        self.spacing_input.setText("5")
-        self.spacing_input.textChanged.connect(self.update_watermark)
+        self.spacing_input = QSpinBox(self)
+        self.spacing_input.setRange(0, 100)
+        self.spacing_input.setValue(5)
+        self.spacing_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("文字和图片间隔", self.spacing_input)
 
         # 新增复选框：是否添加阴影
         self.shadow_checkbox = QCheckBox("添加阴影")
-        self.shadow_checkbox.stateChanged.connect(self.update_watermark)
+        self.shadow_checkbox.stateChanged.connect(self._schedule_update)
         control_layout.addWidget(self.shadow_checkbox)
 
         # 新增输入框：阴影宽度（高斯模糊半径）
-        self.shadow_width_input = QLineEdit(self)
-        self.shadow_width_input.setValidator(QIntValidator(0, 100))
-        self.shadow_width_input.setText("15")
-        self.shadow_width_input.textChanged.connect(self.update_watermark)
+        self.shadow_width_input = QSpinBox(self)
+        self.shadow_width_input.setRange(0, 100)
+        self.shadow_width_input.setValue(15)
+        self.shadow_width_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("阴影宽度 (px)", self.shadow_width_input)
 
         # 新增输入框：阴影浓淡 (%)，默认50%
-        self.shadow_intensity_input = QLineEdit(self)
-        self.shadow_intensity_input.setValidator(QIntValidator(0, 100))
-        self.shadow_intensity_input.setText("80")
-        self.shadow_intensity_input.textChanged.connect(self.update_watermark)
+        self.shadow_intensity_input = QSpinBox(self)
+        self.shadow_intensity_input.setRange(0, 100)
+        self.shadow_intensity_input.setValue(80)
+        self.shadow_intensity_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("阴影浓淡 (%)", self.shadow_intensity_input)
 
         # 图片水印相关输入（以下部分保持不变）
@@ -561,13 +979,13 @@ class WatermarkApp(QMainWindow):
         self.watermark_position_combo = QComboBox(self)
         self.watermark_position_combo.addItems(["下", "上", "左", "右"])
         self.watermark_position_combo.setCurrentText("上")
-        self.watermark_position_combo.currentIndexChanged.connect(self.update_watermark)
+        self.watermark_position_combo.currentIndexChanged.connect(self._schedule_update)
         add_labeled_input("图片水印位置", self.watermark_position_combo)
 
         self.watermark_size_input = QSpinBox(self)
         self.watermark_size_input.setRange(1, 100)
         self.watermark_size_input.setValue(10)
-        self.watermark_size_input.valueChanged.connect(self.update_watermark)
+        self.watermark_size_input.valueChanged.connect(self._schedule_update)
 
         layout = QHBoxLayout()
         label = QLabel("图片大小(%)")
@@ -576,10 +994,10 @@ class WatermarkApp(QMainWindow):
         layout.addWidget(self.watermark_size_input)
         control_layout.addLayout(layout)
 
-        self.watermark_opacity_input = QLineEdit(self)
-        self.watermark_opacity_input.setValidator(QIntValidator(0, 100))
-        self.watermark_opacity_input.setText("80")
-        self.watermark_opacity_input.textChanged.connect(self.update_watermark)
+        self.watermark_opacity_input = QSpinBox(self)
+        self.watermark_opacity_input.setRange(0, 100)
+        self.watermark_opacity_input.setValue(80)
+        self.watermark_opacity_input.valueChanged.connect(self._schedule_update)
         add_labeled_input("图片透明度 (%)", self.watermark_opacity_input)
 
         # 输出图片按钮
@@ -611,6 +1029,11 @@ class WatermarkApp(QMainWindow):
         self.graphics_view.setRenderHint(QPainter.SmoothPixmapTransform)
         self.graphics_view.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.graphics_view.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
+        self._update_nav_buttons()
+
+    def _schedule_update(self):
+        # 重新计时，80ms 内没有新的修改才真正刷新预览
+        self._timer.start(80)
 
     def select_font(self):
         dialog = FontListDialog(self)  # 创建并弹出自定义对话框
@@ -618,9 +1041,7 @@ class WatermarkApp(QMainWindow):
             selected_font_path = dialog.get_selected_font_path()
             if selected_font_path:
                 self.font_path = selected_font_path
-                # 更新 WatermarkProcessor 中的字体路径
-                if self.processor:
-                    self.processor.font_path = self.font_path
+                # 新字体随下一次预览任务传给 WatermarkProcessor
                 self.update_watermark()
 
 
@@ -632,65 +1053,140 @@ class WatermarkApp(QMainWindow):
 
     def load_images(self):
         files, _ = QFileDialog.getOpenFileNames(self, "选择图片", "", "Images (*.png *.jpg *.jpeg *.bmp)")
-        if files:
-            self.image_paths = files
-            self.load_image(files[0])
+        # 预览第一张能读取的图片；全部无法读取时保留当前的图片列表
+        for index, path in enumerate(files):
+            if self.load_image(path):
+                self.image_paths = files
+                self.current_index = index
+                break
+        self._update_nav_buttons()
+
+    def show_prev_image(self):
+        self._step_image(-1)
+
+    def show_next_image(self):
+        self._step_image(1)
+
+    def _step_image(self, step):
+        """
+        从当前图片沿 step 方向（-1 为上一张，1 为下一张）查找并显示下一张能读取的图片，跳过读取失败的图片。
+        只有读取成功后才更新 current_index，保证序号始终对应正在预览的图片。
+        """
+        index = self.current_index + step
+        while 0 <= index < len(self.image_paths):
+            if self.load_image(self.image_paths[index]):
+                self.current_index = index
+                break
+            index += step
+        self._update_nav_buttons()
+
+    def _update_nav_buttons(self):
+        # 已经是第一张 / 最后一张（或只选择了一张图片）时禁用对应的切换按钮
+        self.prev_btn.setEnabled(self.current_index > 0)
+        self.next_btn.setEnabled(self.current_index + 1 < len(self.image_paths))
 
     def load_image(self, path):
-        if os.path.exists(path):
-            image = Image.open(path)
-            self.original_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            self.processor = WatermarkProcessor(self.original_image, self.font_path)
-            self.update_watermark()
-            self.fit_image_to_view()
+        """
+        读取 path 并作为当前预览图片，返回是否读取成功；失败时保持当前图片不变。
+        """
+        # 全程保持 RGB 排列：合成和显示都直接使用该数组，无需再转换颜色通道
+        image = read_image(path) if os.path.exists(path) else None
+        if image is None:
+            self.statusBar().showMessage(f"无法读取图片: {path}", 5000)
+            return False
+        self.original_image = image
+        # 实时预览在缩小后的图像上进行，导出时再用原图重新处理
+        height, width = image.shape[:2]
+        scale = PREVIEW_MAX_SIDE / max(width, height)
+        if scale < 1.0:
+            import cv2
+            preview_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            self.preview_image = cv2.resize(image, preview_size, interpolation=cv2.INTER_AREA)
+        else:
+            self.preview_image = self.original_image
+        # 原图与预览图都设为只读：处理时只复制需要修改的区域，不会误改原始像素
+        self.original_image.flags.writeable = False
+        self.preview_image.flags.writeable = False
+        pixel_scale = self.preview_image.shape[1] / width
+        self.processor = WatermarkProcessor(self.preview_image, self.font_path, pixel_scale)
+        self._last_state = None
+        self._fit_pending = True
+        self.update_watermark()
+        return True
 
     def load_watermark_image(self):
         file, _ = QFileDialog.getOpenFileName(self, "选择水印图片", "", "Images (*.png *.jpg *.jpeg *.bmp)")
         if file:
             self.watermark_image = Image.open(file).convert('RGBA')
+            self._last_state = None
             self.update_watermark()
 
     def fit_image_to_view(self):
         if self.original_image is not None:
             self.graphics_view.fitInView(self.image_item, Qt.KeepAspectRatio)
 
-    def show_image(self, pil_image):
-        if pil_image is not None:
-            image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGBA2RGB)
-            h, w, ch = image.shape
-            bytes_per_line = ch * w
-            q_image = QImage(image.data, w, h, bytes_per_line, QImage.Format_RGB888)
+    def show_image(self, image):
+        if image is not None:
+            # image 为 RGB ndarray，可直接作为 Format_RGB888 的数据。
+            # QImage 不会复制数据，这里确保内存连续并在 self 上保留引用，避免缓冲区被提前回收
+            self._display_buf = np.ascontiguousarray(image)
+            h, w, ch = self._display_buf.shape
+            bytes_per_line = self._display_buf.strides[0]
+            q_image = QImage(self._display_buf.data, w, h, bytes_per_line, QImage.Format_RGB888)
             pixmap = QPixmap.fromImage(q_image)
             self.image_item.setPixmap(pixmap)
             self.graphics_scene.setSceneRect(0, 0, w, h)
 
     def update_watermark(self):
+        # 直接调用时取消尚未触发的延迟刷新，避免重复渲染
+        self._timer.stop()
         if self.original_image is None or not self.processor:
             return
+        if self._render_task is not None:
+            # 处理器的预览缓冲区正被后台任务使用，等它结束后再渲染
+            self._render_pending = True
+            return
         text = self.text_input.text()
         text_params = {
-            "font_size": int(self.font_size_input.text() or "1"),
+            "font_size": self.font_size_input.value(),
             "position": self.position_combo.currentText(),
-            "opacity": int(self.opacity_input.text() or "1"),
-            "offset_x": int(self.offset_x_input.text() or "0"),
-            "offset_y": int(self.offset_y_input.text() or "0"),
+            "opacity": self.opacity_input.value(),
+            "offset_x": self.offset_x_input.value(),
+            "offset_y": self.offset_y_input.value(),
             "shadow": self.shadow_checkbox.isChecked(),
-            "shadow_width": int(self.shadow_width_input.text() or "0"),
-            "shadow_intensity": int(self.shadow_intensity_input.text() or "50")
+            "shadow_width": self.shadow_width_input.value(),
+            "shadow_intensity": self.shadow_intensity_input.value()
         }
         image_params = {
             "position": self.watermark_position_combo.currentText(),
-            "size": int(self.watermark_size_input.text() or "1"),
-            "opacity": int(self.watermark_opacity_input.text() or "0"),
-            "spacing": int(self.spacing_input.text() or "0")
+            "size": self.watermark_size_input.value(),
+            "opacity": self.watermark_opacity_input.value(),
+            "spacing": self.spacing_input.value()
         }
-        final_image = self.processor.process(
-            text,
-            text_params,
-            image_watermark=self.watermark_image,
-            image_params=image_params if self.watermark_image else None
-        )
-        self.show_image(final_image)
+        # 参数与上次完全相同（例如程序设置了相同的值）时，当前显示已是最新结果
+        state = (text, tuple(text_params.items()), tuple(image_params.items()), self.font_path)
+        if state == self._last_state:
+            return
+        self._last_state = state
+        task = RenderTask(self.processor, self.font_path, text, text_params, self.watermark_image,
+                          image_params if self.watermark_image else None)
+        task.signals.finished.connect(self.on_render_finished)
+        self._render_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def on_render_finished(self, final_image):
+        task, self._render_task = self._render_task, None
+        if task.processor is not self.processor:
+            # 任务开始后又加载了新图片，丢弃旧图片的结果
+            self._render_pending = True
+        elif final_image is not None:
+            self.show_image(final_image)
+            if self._fit_pending:
+                self._fit_pending = False
+                self.fit_image_to_view()
+        if self._render_pending:
+            self._render_pending = False
+            self.update_watermark()
 
     def export_image(self):
         if self.original_image is None or not self.processor:
@@ -698,9 +1194,10 @@ class WatermarkApp(QMainWindow):
 
         default_output = "example_waterMarked.jpg"
         if self.image_paths:
-            base_name = os.path.basename(self.image_paths[0])
+            current_path = self.image_paths[self.current_index]
+            base_name = os.path.basename(current_path)
             name, ext = os.path.splitext(base_name)
-            default_output = os.path.join(os.path.dirname(self.image_paths[0]), name + "_waterMarked" + ext)
+            default_output = os.path.join(os.path.dirname(current_path), name + "_waterMarked" + ext)
         dialog = ExportDialog(default_output, self)
         if dialog.exec_() == QDialog.Accepted:
             settings = dialog.get_settings()
@@ -710,22 +1207,24 @@ class WatermarkApp(QMainWindow):
 
             text = self.text_input.text()
             text_params = {
-                "font_size": int(self.font_size_input.text() or "1"),
+                "font_size": self.font_size_input.value(),
                 "position": self.position_combo.currentText(),
-                "opacity": int(self.opacity_input.text() or "1"),
-                "offset_x": int(self.offset_x_input.text() or "0"),
-                "offset_y": int(self.offset_y_input.text() or "0"),
+                "opacity": self.opacity_input.value(),
+                "offset_x": self.offset_x_input.value(),
+                "offset_y": self.offset_y_input.value(),
                 "shadow": self.shadow_checkbox.isChecked(),
-                "shadow_width": int(self.shadow_width_input.text() or "15"),
-                "shadow_intensity": int(self.shadow_intensity_input.text() or "50")
+                "shadow_width": self.shadow_width_input.value(),
+                "shadow_intensity": self.shadow_intensity_input.value()
             }
             image_params = {
                 "position": self.watermark_position_combo.currentText(),
-                "size": int(self.watermark_size_input.text() or "1"),
-                "opacity": int(self.watermark_opacity_input.text() or "0"),
-                "spacing": int(self.spacing_input.text() or "0")
+                "size": self.watermark_size_input.value(),
+                "opacity": self.watermark_opacity_input.value(),
+                "spacing": self.spacing_input.value()
             }
-            final_image = self.processor.process(
+            # 预览处理器作用在缩小后的图像上，导出时用原图重新生成
+            processor = WatermarkProcessor(self.original_image, self.font_path)
+            final_image = processor.process(
                 text,
                 text_params,
                 image_watermark=self.watermark_image,
@@ -733,10 +1232,7 @@ class WatermarkApp(QMainWindow):
             )
 
             try:
-                if fmt == "JPEG":
-                    final_image.convert('RGB').save(output_path, "JPEG", quality=quality)
-                else:
-                    final_image.save(output_path, "PNG")
+                save_image(final_image, output_path, fmt, quality)
             except Exception as e:
                 print("保存失败:", e)
     